@@ -1,8 +1,10 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from flask_compress import Compress
 import logging
 from datetime import datetime
 import sqlite3
+import secrets
 import os
 
 # Configure logging
@@ -17,43 +19,103 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["ETag", "X-Data-Version"])
+
+# Compress large JSON responses (e.g. /all) with brotli or gzip
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_MIN_SIZE"] = 500
+Compress(app)
 
 DB_PATH = 'resume_requests.db'
 
 def init_db():
-    if not os.path.exists(DB_PATH):
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS resume_requests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                full_name TEXT,
-                email_address TEXT,
-                phone_number TEXT,
-                career_objective TEXT,
-                education TEXT,
-                skills TEXT,
-                projects TEXT,
-                work_experience TEXT,
-                certifications TEXT,
-                linkedin_url TEXT,
-                github_url TEXT,
-                transaction_id TEXT,
-                payment_checkbox TEXT,
-                payment_screenshot TEXT,
-                job_description TEXT,
-                is_verified INTEGER DEFAULT 0,
-                resume_sent INTEGER DEFAULT 0,
-                submission_timestamp TEXT
-            )
-        ''')
-        conn.commit()
-        conn.close()
+    is_new = not os.path.exists(DB_PATH)
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resume_requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            full_name TEXT,
+            email_address TEXT,
+            phone_number TEXT,
+            career_objective TEXT,
+            education TEXT,
+            skills TEXT,
+            projects TEXT,
+            work_experience TEXT,
+            certifications TEXT,
+            linkedin_url TEXT,
+            github_url TEXT,
+            transaction_id TEXT,
+            payment_checkbox TEXT,
+            payment_screenshot TEXT,
+            job_description TEXT,
+            is_verified INTEGER DEFAULT 0,
+            resume_sent INTEGER DEFAULT 0,
+            submission_timestamp TEXT,
+            row_version INTEGER DEFAULT 0
+        )
+    ''')
+
+    # Older databases were created without the row_version column
+    cursor.execute("PRAGMA table_info(resume_requests)")
+    columns = [column[1] for column in cursor.fetchall()]
+    if "row_version" not in columns:
+        cursor.execute("ALTER TABLE resume_requests ADD COLUMN row_version INTEGER DEFAULT 0")
+        logger.info("Added row_version column to resume_requests.")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resume_requests_row_version ON resume_requests (row_version)")
+
+    # Single change counter per table, bumped on every insert/update.
+    # The random epoch identifies this counter, so a counter recreated from
+    # scratch (e.g. a redeploy from the committed DB) never reuses old ETags.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            epoch TEXT
+        )
+    ''')
+    cursor.execute("PRAGMA table_info(data_versions)")
+    columns = [column[1] for column in cursor.fetchall()]
+    if "epoch" not in columns:
+        cursor.execute("ALTER TABLE data_versions ADD COLUMN epoch TEXT")
+    cursor.execute("INSERT OR IGNORE INTO data_versions (table_name, version) VALUES ('resume_requests', 0)")
+    cursor.execute(
+        "UPDATE data_versions SET epoch = ? WHERE table_name = 'resume_requests' AND epoch IS NULL",
+        (secrets.token_hex(8),)
+    )
+
+    conn.commit()
+    conn.close()
+    if is_new:
         logger.info("✅ Database initialized with correct schema.")
     else:
         logger.info("Database already exists.")
 
+
+def bump_version(cursor):
+    """Increment the resume_requests change counter and return the new value.
+
+    Must be called inside the same transaction as the write it stamps.
+    """
+    cursor.execute("UPDATE data_versions SET version = version + 1 WHERE table_name = 'resume_requests'")
+    cursor.execute("SELECT version FROM data_versions WHERE table_name = 'resume_requests'")
+    return cursor.fetchone()[0]
+
+
+def stamp_row(cursor, submission_id):
+    """Bump the change counter and stamp it on an updated row."""
+    version = bump_version(cursor)
+    cursor.execute("UPDATE resume_requests SET row_version = ? WHERE id = ?", (version, submission_id))
+
+
+def get_version(cursor):
+    """Return the (epoch, version) pair for resume_requests."""
+    cursor.execute("SELECT epoch, version FROM data_versions WHERE table_name = 'resume_requests'")
+    epoch, version = cursor.fetchone()
+    return epoch, version
+
 init_db()
 
 @app.route("/submit", methods=["POST"])
@@ -70,14 +132,15 @@ def submit():
 
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
+        version = bump_version(cursor)
 
         cursor.execute('''
     INSERT INTO resume_requests (
         full_name, email_address, phone_number, career_objective, education,
         skills, projects, work_experience, certifications, linkedin_url,
         github_url, transaction_id, payment_checkbox, payment_screenshot, job_description,
-        submission_timestamp
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        submission_timestamp, row_version
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 ''', (
     data.get("full_name"),
     data.get("email_address"),
@@ -94,7 +157,8 @@ def submit():
     data.get("☑️_payment_confirmation_checkbox", ""),
     data.get("📤_upload_screenshot_of_payment", ""),
     data.get("paste_the_job_description_(jd)_or_job_post", ""),
-    data["submission_timestamp"]
+    data["submission_timestamp"],
+    version
 ))
 
         conn.commit()
@@ -112,18 +176,62 @@ def submit():
 
 @app.route("/all", methods=["GET"])
 def get_all_submissions():
+    # Optional delta mode: /all?since=<X-Data-Version> returns only rows changed after
+    # that version. since=0 (or no since) returns the full list.
+    since = request.args.get("since", "0")
+    since_epoch, since_version = None, 0
+    if since != "0":
+        since_epoch, _, since_version = since.rpartition("-")
+        try:
+            since_version = int(since_version)
+        except ValueError:
+            return jsonify({"error": "Invalid 'since' version"}), 400
+        if not since_epoch:
+            return jsonify({"error": "Invalid 'since' version"}), 400
+
     try:
         conn = sqlite3.connect(DB_PATH)
         conn.row_factory = sqlite3.Row  # This allows dictionary-style access
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM resume_requests")
+
+        # Read the counter and the rows in one snapshot so they always match
+        cursor.execute("BEGIN")
+        epoch, version = get_version(cursor)
+        data_version = f"{epoch}-{version}"
+
+        # Unchanged since the client's last poll: skip reading row data entirely
+        if request.if_none_match.contains_weak(data_version):
+            conn.commit()
+            conn.close()
+            response = app.response_class(status=304)
+            response.set_etag(data_version, weak=True)
+            response.headers["X-Data-Version"] = data_version
+            return response
+
+        # Cursor from a reset counter: the client's cached rows can't be patched
+        if since_epoch is not None and (since_epoch != epoch or since_version > version):
+            conn.commit()
+            conn.close()
+            logger.info(f"Stale delta cursor {since}, current version {data_version}")
+            response = jsonify({"error": "Data version reset, fetch /all again"})
+            response.headers["X-Data-Version"] = data_version
+            return response, 410
+
+        if since_epoch is None:
+            cursor.execute("SELECT * FROM resume_requests")
+        else:
+            cursor.execute("SELECT * FROM resume_requests WHERE row_version > ? ORDER BY row_version", (since_version,))
         rows = cursor.fetchall()
+        conn.commit()
         conn.close()
 
         result = [dict(row) for row in rows]  # Convert each row to dict
 
-        logger.info(f"Returning {len(result)} submissions")
-        return jsonify(result), 200
+        logger.info(f"Returning {len(result)} submissions (version {data_version})")
+        response = jsonify(result)
+        response.set_etag(data_version, weak=True)
+        response.headers["X-Data-Version"] = data_version
+        return response, 200
 
     except Exception as e:
         logger.error(f"❌ Error fetching submissions: {str(e)}")
@@ -151,6 +259,9 @@ def verify_payment():
         else:
             return jsonify({"error": "Invalid action"}), 400
 
+        if cursor.rowcount:
+            stamp_row(cursor, submission_id)
+
         conn.commit()
         conn.close()
 
@@ -206,6 +317,8 @@ def generate_resume():
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
         cursor.execute("UPDATE resume_requests SET resume_sent = 1 WHERE id = ?", (submission_id,))
+        if cursor.rowcount:
+            stamp_row(cursor, submission_id)
         conn.commit()
         conn.close()
 